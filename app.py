@@ -5,8 +5,23 @@ import pandas as pd
 import numpy as np
 import os
 import shutil
-import json
 import time
+import heapq
+from image_features import ImageFeatureStore, ImageFeatureError
+from breed_registry import BreedRegistry, UNKNOWN_BREED_ID, canonical_breed_name
+from dog_store import STREAM_CHUNK_SIZE, index_dog, iter_jsonl_chunks, count_jsonl_records, append_jsonl
+
+def top_k_order(scores, top_k):
+    # 점수 내림차순(동점이면 앞쪽 우선) 상위 top_k의 인덱스, 전체 정렬 없이 후보만 정렬
+    if len(scores) > top_k:
+        kth = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+        candidates = np.nonzero(scores >= kth)[0]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')][:top_k]
+
+# 이미지 특징 파일은 등록 N건마다 한 번, 그리고 종료 시 저장
+FEATURE_SAVE_EVERY = 20
 
 class DataManager:
     def __init__(self, csv_path='speciesspecies.csv'):
@@ -18,6 +33,7 @@ class DataManager:
             'age' : 20.0,
             'gender': 1.0,             
             'size': 2.0,              
+            'image': 1.0,
             'Skull_Index': 46.0,       
             'Body_Ratio': 0.7,        
             'trainability': 2.4, 
@@ -29,6 +45,7 @@ class DataManager:
             'age' : 10.0,
             'gender': 0.7,             
             'size': 3.0,              
+            'image': 3.0,
             'Skull_Index': 1.0,       
             'Body_Ratio': 1.0,        
             'trainability': 1.0, 
@@ -41,15 +58,24 @@ class DataManager:
         self.db_folder = os.path.join(os.getcwd(), 'dog_db')
         self.img_folder = os.path.join(self.db_folder, 'images')
         self.json_path = os.path.join(self.db_folder, 'dog_data.json')
+        self.jsonl_path = os.path.join(self.db_folder, 'dog_data.jsonl')
+        self.features_path = os.path.join(self.db_folder, 'image_features.npz')
+        self.breed_ids_path = os.path.join(self.db_folder, 'breed_ids.json')
         
         if not os.path.exists(self.img_folder):
             os.makedirs(self.img_folder)
             
-        self.registered_dogs = [] 
-        self.breed_map = {}
+        # 전체 목록은 일반 매칭에서 처음 필요할 때만 읽음 (스트리밍 모드는 읽지 않음)
+        self.registered_dogs = None
+        self.dog_columns = None
+        self.dog_count = 0
+        self.breed_registry = BreedRegistry()
+        # 견종 ID별 특징 행렬, 마지막 행(ID -1)은 미등록 견종용 0 벡터
+        self.breed_stats = np.zeros((1, len(self.breed_features)))
+        self.image_features = ImageFeatureStore(self.features_path, self.img_folder)
 
         self.load_breed_data()
-        self.load_registered_dogs()
+        self.load_db_summary()
 
     def load_breed_data(self):
         if not os.path.exists(self.csv_path):
@@ -60,7 +86,7 @@ class DataManager:
         try:
             df = pd.read_csv(self.csv_path)
             if 'Breed' in df.columns:
-                df['Breed'] = df['Breed'].str.replace('_', ' ').str.lower().str.strip()
+                df['Breed'] = df['Breed'].map(canonical_breed_name)
             
             for col in self.breed_features:
                 if col not in df.columns:
@@ -69,24 +95,54 @@ class DataManager:
                     df[col] = df[col].fillna(0)
             
             self.breed_data = df
-            self.breed_list = sorted(df['Breed'].unique().tolist())
-            
-            self.breed_map = df.set_index('Breed')[self.breed_features].to_dict('index')
+            self.breed_registry = BreedRegistry(df['Breed'], self.breed_ids_path)
+            self.breed_list = sorted(self.breed_registry.ids)
+
+            self.breed_stats = np.zeros((len(self.breed_registry) + 1, len(self.breed_features)))
+            breed_ids = df['Breed'].map(self.breed_registry.ids).dropna().astype(int)
+            self.breed_stats[breed_ids.values] = df.loc[breed_ids.index, self.breed_features].to_numpy(dtype=float)
             
         except Exception as e:
             messagebox.showerror("Error", f"견종 데이터 로드 실패: {e}")
             self.breed_list = []
 
-    def load_registered_dogs(self):
-        if os.path.exists(self.json_path):
+    def load_db_summary(self):
+        # 시작 시에는 줄 수만 세고 이미지 특징 배열만 올림
+        self.dog_count = count_jsonl_records(self.jsonl_path)
+        if not os.path.exists(self.jsonl_path) and os.path.exists(self.json_path):
+            print(f"경고: {self.jsonl_path}이 없습니다. 기존 dog_data.json은 'python dataloader.py --convert'로 변환하세요.")
+        self.image_features.load()
+
+    def ensure_loaded(self):
+        if self.registered_dogs is not None:
+            return
+
+        self.registered_dogs = []
+        if os.path.exists(self.jsonl_path):
             try:
-                with open(self.json_path, 'r', encoding='utf-8') as f:
-                    self.registered_dogs = json.load(f)
+                for chunk in iter_jsonl_chunks(self.jsonl_path):
+                    self.registered_dogs.extend(chunk)
             except Exception as e:
                 print(f"DB 로드 오류: {e}")
                 self.registered_dogs = []
-        else:
-            self.registered_dogs = []
+        self.dog_count = len(self.registered_dogs)
+
+        # 새로 생기거나 수정된 이미지만 특징을 다시 계산 (기존 행 번호는 유지됨)
+        updated = self.image_features.sync([dog.get('image') for dog in self.registered_dogs])
+        if updated:
+            print(f"이미지 특징 {updated}건 새로 계산됨")
+            self.image_features.save()
+
+        for dog in self.registered_dogs:
+            index_dog(dog, self.breed_registry, self.image_features)
+        if self.breed_registry.unmapped:
+            print(self.breed_registry.unmapped_report())
+
+    def get_dog_columns(self):
+        self.ensure_loaded()
+        if self.dog_columns is None:
+            self.dog_columns = self.chunk_columns(self.registered_dogs)
+        return self.dog_columns
 
     def register_dog(self, info, original_image_path):
         saved_image_path = None
@@ -101,24 +157,65 @@ class DataManager:
                 saved_image_path = None
         
         info['image'] = saved_image_path
-        self.registered_dogs.append(info)
-        self.save_to_json()
-
-    def save_to_json(self):
-        try:
-            with open(self.json_path, 'w', encoding='utf-8') as f:
-                json.dump(self.registered_dogs, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            print(f"저장 실패: {e}")
-
-    def calculate_matches(self, user_prefs, weights):
-        if not self.registered_dogs:
+        if saved_image_path:
+            self.image_features.add(saved_image_path)
+            self.image_features.save_if_pending(FEATURE_SAVE_EVERY)
+        index_dog(info, self.breed_registry, self.image_features)
+
+        # dog_data.jsonl이 유일한 저장소: 한 줄 추가가 실패하면 예외를 그대로 올림
+        append_jsonl(self.jsonl_path, info)
+        self.dog_count += 1
+        if self.registered_dogs is not None:
+            self.registered_dogs.append(info)
+            self.dog_columns = None
+
+    def close(self):
+        self.image_features.save_if_pending()
+
+    def score_similar(self, feature_keys, store_dist):
+        # 특징이 있는 강아지만 골라 저장소 거리 벡터에서 꺼냄
+        rows = self.image_features.rows_of(feature_keys)
+        idx = np.nonzero(rows >= 0)[0]
+        dist = store_dist[rows[idx]]
+        return idx, np.round((1.0 - dist) * 100, 1), np.round(dist, 2)
+
+    def find_similar_dogs(self, query_image_path, top_k=50):
+        feature_keys = self.get_dog_columns()['feature_key']
+        if len(feature_keys) == 0:
             return []
 
-        results = []
-
-        target_breed_name = str(user_prefs.get('breed', '')).lower().strip()
-        target_breed_stats = self.breed_map.get(target_breed_name, {k: 0 for k in self.breed_features})
+        store_dist = self.image_features.query_distances(query_image_path)
+        idx, scores, dists = self.score_similar(feature_keys, store_dist)
+        top = top_k_order(scores, top_k)
+
+        return [
+            {'dog': self.registered_dogs[i], 'score': score, 'raw_dist': dist}
+            for i, score, dist in zip(idx[top].tolist(), scores[top].tolist(), dists[top].tolist())
+        ]
+
+    def stream_similar_dogs(self, jsonl_path, query_image_path, top_k=50, chunk_size=STREAM_CHUNK_SIZE):
+        store_dist = self.image_features.query_distances(query_image_path)
+        return self.stream_top_k(
+            jsonl_path,
+            lambda chunk: self.score_similar(self.chunk_columns(chunk)['feature_key'], store_dist),
+            top_k, chunk_size
+        )
+
+    def prepare_query(self, user_prefs, weights):
+        # 비교 사진이 있으면 시각 거리를 하나의 특징 축으로 추가 (특징 없는 강아지는 최대 거리)
+        image_weight = weights.get('image', 0)
+        query_image = user_prefs.get('image')
+        visual_dist = None
+        if query_image and image_weight > 0:
+            visual_dist = self.image_features.query_distances(query_image)
+
+        target_breed_id = self.breed_registry.ids.get(canonical_breed_name(user_prefs.get('breed', '')), UNKNOWN_BREED_ID)
+
+        # 견종 특징 거리는 견종 쌍에만 의존하므로 쿼리당 한 번, 견종 ID별로 미리 계산
+        breed_coeffs = np.array([self.feature_coefficients.get(f, 1.0) for f in self.breed_features])
+        breed_ranges = np.array([self.range.get(f, 1.0) for f in self.breed_features])
+        breed_diff = (self.breed_stats - self.breed_stats[target_breed_id]) / breed_ranges
+        breed_term = weights['breed'] * (breed_diff ** 2) @ breed_coeffs
         
         max_sq_sum = 0.0
         max_sq_sum += weights['age'] * self.feature_coefficients['age'] * (1.0 ** 2)
@@ -128,6 +225,9 @@ class DataManager:
         for feature in self.breed_features:
             coeff = self.feature_coefficients.get(feature, 1.0)
             max_sq_sum += weights['breed'] * coeff * (1.0 ** 2)
+
+        if visual_dist is not None:
+            max_sq_sum += image_weight * self.feature_coefficients['image'] * (1.0 ** 2)
         
 
         max_sq_sum += self.mismatch_penalty 
@@ -135,60 +235,133 @@ class DataManager:
         max_distance = np.sqrt(max_sq_sum)
         if max_distance == 0: max_distance = 1.0
 
-        for dog in self.registered_dogs:
-            try:
-                dog_age = float(dog.get('age', 0))
-                age_diff = user_prefs['age'] - dog_age
-                
-                dog_gender = int(dog.get('gender', 0))
-                gender_diff = user_prefs['gender'] - dog_gender
-                
-                dog_size = int(dog.get('size', 0))
-                size_diff = user_prefs['size'] - dog_size
-
-                dog_breed_name = str(dog.get('breed', '')).lower().strip()
-                dog_breed_stats = self.breed_map.get(dog_breed_name, {k: 0 for k in self.breed_features})
-
-                weighted_sum_sq = 0.0
-                weighted_sum_sq += weights['age'] * self.feature_coefficients['age'] * ((age_diff/self.range['age']) ** 2)
-                weighted_sum_sq += weights['gender'] * self.feature_coefficients['gender'] * ((gender_diff/self.range['gender']) ** 2)
-                weighted_sum_sq += weights['size'] * self.feature_coefficients['size'] * ((size_diff/self.range['size']) ** 2)
-
-                for feature in self.breed_features:
-                    target_val = target_breed_stats.get(feature, 0)
-                    dog_val = dog_breed_stats.get(feature, 0)
-                    feat_diff = target_val - dog_val
-                    
-                    coeff = self.feature_coefficients.get(feature, 1.0)
-                    rang = self.range.get(feature, 1.0)
-                    
-                    weighted_sum_sq += weights['breed'] * coeff * ((feat_diff/rang) ** 2)
-
-                if target_breed_name != dog_breed_name:
-                    weighted_sum_sq += self.mismatch_penalty
-
-                final_distance = np.sqrt(weighted_sum_sq)
-                
-                ratio = final_distance / max_distance
-
-                if ratio > 1.0: 
-                    ratio = 1.0
-                
-                score = (1.0 - ratio) * 100
-                
-                results.append({
-                    'dog': dog,
-                    'score': round(score, 1),
-                    'raw_dist': round(final_distance, 2)
-                })
+        return {
+            'prefs': user_prefs,
+            'weights': weights,
+            'image_weight': image_weight,
+            'visual_dist': visual_dist,
+            'target_breed_id': target_breed_id,
+            'breed_term': breed_term,
+            'max_distance': max_distance
+        }
 
-            except Exception as e:
-                print(f"개별 강아지 계산 오류 ({dog.get('name')}): {e}")
-                continue
+    def chunk_columns(self, dogs):
+        # 레코드 목록 -> 열 배열, 숫자가 아닌 값은 NaN (score_chunk에서 제외)
+        table = pd.DataFrame.from_records(dogs, columns=['name', 'age', 'gender', 'size', 'breed', 'feature_key'])
+
+        columns = {'name': table['name'].to_numpy()}
+        for field in ('age', 'gender', 'size'):
+            columns[field] = pd.to_numeric(table[field].fillna(0), errors='coerce').to_numpy(dtype=float)
+        columns['gender'] = np.trunc(columns['gender'])
+        columns['size'] = np.trunc(columns['size'])
+
+        # 레코드에는 정규화된 견종명만 저장, ID는 현재 레지스트리로 매번 매핑 (Series.map, 문자열 가공 없음)
+        columns['breed_id'] = table['breed'].map(self.breed_registry.ids).fillna(UNKNOWN_BREED_ID).to_numpy(dtype=np.intp)
+
+        columns['feature_key'] = table['feature_key'].fillna('').to_numpy(dtype=str)
+        return columns
+
+    def score_chunk(self, columns, query):
+        valid = ~(np.isnan(columns['age']) | np.isnan(columns['gender']) | np.isnan(columns['size']))
+        for i in np.nonzero(~valid)[0].tolist():
+            print(f"개별 강아지 계산 오류 ({columns['name'][i]}): 나이/성별/크기 값이 숫자가 아닙니다")
+        idx = np.nonzero(valid)[0]
+
+        prefs = query['prefs']
+        weights = query['weights']
+        ids = columns['breed_id'][idx]
+
+        age_diff = prefs['age'] - columns['age'][idx]
+        gender_diff = prefs['gender'] - columns['gender'][idx]
+        size_diff = prefs['size'] - columns['size'][idx]
+
+        weighted_sum_sq = np.zeros(len(idx))
+        weighted_sum_sq += weights['age'] * self.feature_coefficients['age'] * ((age_diff/self.range['age']) ** 2)
+        weighted_sum_sq += weights['gender'] * self.feature_coefficients['gender'] * ((gender_diff/self.range['gender']) ** 2)
+        weighted_sum_sq += weights['size'] * self.feature_coefficients['size'] * ((size_diff/self.range['size']) ** 2)
+
+        weighted_sum_sq += query['breed_term'][ids]
+
+        visual_dist = query['visual_dist']
+        if visual_dist is not None:
+            rows = self.image_features.rows_of(columns['feature_key'][idx])
+            has_row = rows >= 0
+            image_diff = np.full(len(idx), self.range['image'])
+            image_diff[has_row] = visual_dist[rows[has_row]]
+            weighted_sum_sq += query['image_weight'] * self.feature_coefficients['image'] * ((image_diff/self.range['image']) ** 2)
+
+        target_breed_id = query['target_breed_id']
+        if target_breed_id == UNKNOWN_BREED_ID:
+            weighted_sum_sq += self.mismatch_penalty
+        else:
+            weighted_sum_sq += self.mismatch_penalty * (ids != target_breed_id)
 
-        results.sort(key=lambda x: x['score'], reverse=True)
-        
-        return results
+        final_distance = np.sqrt(weighted_sum_sq)
+        ratio = np.minimum(final_distance / query['max_distance'], 1.0)
+        score = (1.0 - ratio) * 100
+
+        return idx, np.round(score, 1), np.round(final_distance, 2)
+
+    def calculate_matches(self, user_prefs, weights):
+        columns = self.get_dog_columns()
+        if not self.registered_dogs:
+            return []
+
+        query = self.prepare_query(user_prefs, weights)
+        idx, scores, dists = self.score_chunk(columns, query)
+        order = np.argsort(-scores, kind='stable')
+
+        return [
+            {'dog': self.registered_dogs[i], 'score': score, 'raw_dist': dist}
+            for i, score, dist in zip(idx[order].tolist(), scores[order].tolist(), dists[order].tolist())
+        ]
+
+    def stream_matches(self, jsonl_path, user_prefs, weights, top_k=50, chunk_size=STREAM_CHUNK_SIZE):
+        query = self.prepare_query(user_prefs, weights)
+        return self.stream_top_k(
+            jsonl_path,
+            lambda chunk: self.score_chunk(self.chunk_columns(chunk), query),
+            top_k, chunk_size
+        )
+
+    def stream_top_k(self, jsonl_path, score_fn, top_k, chunk_size):
+        # score_fn(chunk) -> (chunk 내 인덱스, 점수, 거리)
+        # (점수, -순번) 최소 힙: 상위 top_k만 유지, 동점이면 먼저 읽은 강아지 우선
+        heap = []
+        total = 0
+        start_time = time.perf_counter()
+
+        for chunk in iter_jsonl_chunks(jsonl_path, chunk_size):
+            idx, scores, dists = score_fn(chunk)
+
+            # 청크 안에서 k번째 점수 이상이고 힙 최솟값 이상인 후보만 힙에 넣음
+            threshold = -np.inf
+            if len(scores) > top_k:
+                threshold = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+            if len(heap) >= top_k:
+                threshold = max(threshold, heap[0][0])
+
+            for i in np.nonzero(scores >= threshold)[0].tolist():
+                item = (scores[i].item(), -(total + idx[i].item()), chunk[idx[i]], dists[i].item())
+                if len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, item)
+            total += len(chunk)
+
+        elapsed = time.perf_counter() - start_time
+        stats = {
+            'dogs': total,
+            'seconds': elapsed,
+            'dogs_per_sec': total / elapsed if elapsed > 0 else 0.0
+        }
+        print(f"스트리밍 매칭: {total}마리, {elapsed:.2f}초 ({stats['dogs_per_sec']:,.0f} dogs/s)")
+
+        results = [
+            {'dog': dog, 'score': score, 'raw_dist': dist}
+            for score, _, dog, dist in sorted(heap, key=lambda x: x[:2], reverse=True)
+        ]
+        return results, stats
 
 class SearchableCombobox(ttk.Combobox):
     def __init__(self, master=None, all_values=None, **kwargs):
@@ -216,7 +389,7 @@ class MainPage(tk.Frame):
         label = tk.Label(self, text="유기견 매칭 시스템", font=("맑은 고딕", 24, "bold"))
         label.pack(pady=50)
         
-        tk.Label(self, text=f"현재 데이터: {len(controller.data_manager.registered_dogs)}마리 로드됨", font=("맑은 고딕", 12), fg="blue").pack()
+        tk.Label(self, text=f"현재 데이터: {controller.data_manager.dog_count}마리 등록됨", font=("맑은 고딕", 12), fg="blue").pack()
         tk.Label(self, text="데이터는 실행 폴더의 /dog_db 에 저장됩니다.", font=("맑은 고딕", 10), fg="gray").pack()
 
         btn_frame = tk.Frame(self)
@@ -312,6 +485,10 @@ class RegisterPage(tk.Frame):
 
             age = int(age_str)
             size_str = self.combo_size.get()
+
+            if breed not in self.controller.data_manager.breed_registry:
+                if not messagebox.askyesno("확인", f"'{breed}'은(는) 견종 데이터에 없는 견종입니다.\n견종 특징 없이 등록할까요?"):
+                    return
             
             size_map = {"소형": 0, "중형": 1, "대형": 2}
             
@@ -337,6 +514,8 @@ class RegisterPage(tk.Frame):
             
         except ValueError:
             messagebox.showerror("오류", "나이는 숫자로 입력해주세요.")
+        except OSError as e:
+            messagebox.showerror("오류", f"저장 실패: {e}")
 
 class MatchPage(tk.Frame):
     def __init__(self, master, controller):
@@ -371,6 +550,15 @@ class MatchPage(tk.Frame):
         self.combo_breed = SearchableCombobox(input_frame, width=15)
         self.combo_breed.grid(row=3, column=1, pady=5)
 
+        self.query_image_path = None
+        tk.Label(input_frame, text="비교 사진:").grid(row=4, column=0, pady=5)
+        photo_frame = tk.Frame(input_frame)
+        photo_frame.grid(row=4, column=1, pady=5)
+        tk.Button(photo_frame, text="사진 선택", command=self.select_query_image).pack(side="left")
+        tk.Button(photo_frame, text="취소", command=self.clear_query_image).pack(side="left")
+        self.lbl_query_image = tk.Label(input_frame, text="선택 안 함", fg="gray", width=20)
+        self.lbl_query_image.grid(row=5, column=0, columnspan=2)
+
         weight_frame = tk.LabelFrame(container, text="중요도 (1-10)")
         weight_frame.pack(side="right", padx=10, fill="y")
 
@@ -394,8 +582,22 @@ class MatchPage(tk.Frame):
         self.scale_breed.set(5)
         self.scale_breed.grid(row=3, column=1)
 
-        btn_search = tk.Button(self, text="결과 보기 (Result)", command=self.search_matches, bg="pink", width=20, height=2)
-        btn_search.pack(pady=15)
+        tk.Label(weight_frame, text="사진 중요도:").grid(row=4, column=0)
+        self.scale_image = tk.Scale(weight_frame, from_=0, to=10, orient="horizontal", length=100)
+        self.scale_image.set(5)
+        self.scale_image.grid(row=4, column=1)
+
+        btn_frame = tk.Frame(self)
+        btn_frame.pack(pady=15)
+
+        btn_search = tk.Button(btn_frame, text="결과 보기 (Result)", command=self.search_matches, bg="pink", width=20, height=2)
+        btn_search.pack(side="left", padx=5)
+
+        btn_photo_search = tk.Button(btn_frame, text="닮은 강아지 찾기\n(사진만 사용)", command=self.search_similar, width=20, height=2)
+        btn_photo_search.pack(side="left", padx=5)
+
+        self.var_stream = tk.BooleanVar(value=False)
+        tk.Checkbutton(self, text="대용량 스트리밍 모드 (dog_data.jsonl을 나눠 읽어 상위 50마리만 유지)", variable=self.var_stream).pack()
 
         tk.Button(self, text="뒤로가기", command=lambda: controller.show_frame("MainPage")).pack()
 
@@ -404,6 +606,35 @@ class MatchPage(tk.Frame):
             self.combo_breed.all_values = self.controller.data_manager.breed_list
             self.combo_breed['values'] = self.controller.data_manager.breed_list
 
+    def select_query_image(self):
+        file_path = filedialog.askopenfilename(filetypes=[("Image files", "*.jpg;*.jpeg;*.png;*.gif")])
+        if file_path:
+            self.query_image_path = file_path
+            self.lbl_query_image.config(text=os.path.basename(file_path), fg="black")
+
+    def clear_query_image(self):
+        self.query_image_path = None
+        self.lbl_query_image.config(text="선택 안 함", fg="gray")
+
+    def search_similar(self):
+        if not self.query_image_path:
+            messagebox.showwarning("경고", "비교할 사진을 선택해주세요.")
+            return
+        try:
+            data_manager = self.controller.data_manager
+            if self.var_stream.get():
+                if not os.path.exists(data_manager.jsonl_path):
+                    messagebox.showwarning("경고", "dog_data.jsonl이 없습니다. dataloader.py를 먼저 실행해주세요.")
+                    return
+                results, _ = data_manager.stream_similar_dogs(data_manager.jsonl_path, self.query_image_path)
+            else:
+                results = data_manager.find_similar_dogs(self.query_image_path)
+            self.controller.show_results(results)
+        except ImageFeatureError as e:
+            messagebox.showerror("오류", str(e))
+        except Exception as e:
+            messagebox.showerror("오류", f"검색 중 오류 발생: {e}")
+
     def search_matches(self):
         try:
             age_val_str = self.entry_age.get()
@@ -420,23 +651,34 @@ class MatchPage(tk.Frame):
                 'age': age_val,
                 'gender': self.var_gender.get(),
                 'size': size_map[self.combo_size.get()],
-                'breed': breed_val
+                'breed': breed_val,
+                'image': self.query_image_path
             }
             
             weights = {
                 'age': self.scale_age.get(),
                 'gender': self.scale_gender.get(),
                 'size': self.scale_size.get(),
-                'breed': self.scale_breed.get()
+                'breed': self.scale_breed.get(),
+                'image': self.scale_image.get()
             }
 
             weights = {key: value ** 2 for key, value in weights.items()}
             
-            results = self.controller.data_manager.calculate_matches(prefs, weights)
+            data_manager = self.controller.data_manager
+            if self.var_stream.get():
+                if not os.path.exists(data_manager.jsonl_path):
+                    messagebox.showwarning("경고", "dog_data.jsonl이 없습니다. dataloader.py를 먼저 실행해주세요.")
+                    return
+                results, _ = data_manager.stream_matches(data_manager.jsonl_path, prefs, weights)
+            else:
+                results = data_manager.calculate_matches(prefs, weights)
             self.controller.show_results(results)
             
         except ValueError:
             messagebox.showerror("오류", "나이는 숫자로 입력해주세요.")
+        except ImageFeatureError as e:
+            messagebox.showerror("오류", str(e))
         except Exception as e:
             messagebox.showerror("오류", f"검색 중 오류 발생: {e}")
 
@@ -541,6 +783,11 @@ class DogMatchingApp(tk.Tk):
             frame.grid(row=0, column=0, sticky="nsew")
 
         self.show_frame("MainPage")
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        self.data_manager.close()
+        self.destroy()
 
     def show_frame(self, page_name):
         frame = self.frames[page_name]
@@ -0,0 +1,88 @@
+import csv
+import json
+import os
+import re
+
+UNKNOWN_BREED_ID = -1
+
+# Stanford Dogs 폴더명 접두어 (예: n02085620-Chihuahua)
+_WNID_PREFIX = re.compile(r'^n\d{8}-')
+
+
+def canonical_breed_name(name):
+    if name is None:
+        return ''
+    name = _WNID_PREFIX.sub('', str(name))
+    return ' '.join(name.replace('_', ' ').lower().split())
+
+
+class BreedRegistry:
+    def __init__(self, names=(), id_path=None):
+        # ID -> 견종명 목록은 id_path에 저장되고 뒤에만 추가됨
+        # CSV에 견종이 추가/삭제돼도 기존 견종의 ID는 바뀌지 않음
+        self.id_path = id_path
+        self.names = self.load_ids()
+        known = {name: i for i, name in enumerate(self.names)}
+
+        current = sorted({canonical_breed_name(n) for n in names} - {''})
+        added = [name for name in current if name not in known]
+        for name in added:
+            known[name] = len(self.names)
+            self.names.append(name)
+
+        # 조회는 현재 CSV에 있는 견종만 (빠진 견종은 ID 자리만 유지)
+        self.ids = {name: known[name] for name in current}
+        self.unmapped = {}
+
+        if added:
+            self.save_ids()
+
+    @classmethod
+    def from_csv(cls, csv_path, id_path=None, column='Breed'):
+        if not os.path.exists(csv_path):
+            return cls(id_path=id_path)
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            return cls((row.get(column) for row in csv.DictReader(f)), id_path)
+
+    def load_ids(self):
+        if not self.id_path or not os.path.exists(self.id_path):
+            return []
+        try:
+            with open(self.id_path, 'r', encoding='utf-8') as f:
+                return list(json.load(f))
+        except Exception as e:
+            print(f"견종 ID 파일 로드 오류: {e}")
+            return []
+
+    def save_ids(self):
+        if not self.id_path:
+            return
+        tmp_path = self.id_path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.names, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.id_path)
+        except Exception as e:
+            print(f"견종 ID 파일 저장 실패: {e}")
+
+    def __len__(self):
+        # ID 공간 크기 (CSV에서 빠진 견종 포함)
+        return len(self.names)
+
+    def __contains__(self, name):
+        return canonical_breed_name(name) in self.ids
+
+    def lookup(self, name):
+        canonical = canonical_breed_name(name)
+        breed_id = self.ids.get(canonical, UNKNOWN_BREED_ID)
+        if breed_id == UNKNOWN_BREED_ID:
+            self.unmapped[canonical] = self.unmapped.get(canonical, 0) + 1
+        return breed_id
+
+    def unmapped_report(self):
+        if not self.unmapped:
+            return "매핑되지 않은 견종 없음"
+        items = sorted(self.unmapped.items(), key=lambda x: (-x[1], x[0]))
+        lines = [f"매핑되지 않은 견종 {len(items)}종:"]
+        lines += [f"  - {name or '(빈 값)'}: {count}마리" for name, count in items]
+        return "\n".join(lines)
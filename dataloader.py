@@ -1,15 +1,23 @@
 import os
+import sys
 import shutil
 import json
 import random
 import time
 import kagglehub
+from image_features import ImageFeatureStore, extract_features, feature_key, file_mtime
+from breed_registry import BreedRegistry, canonical_breed_name
+from dog_store import index_dog, write_jsonl
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_FOLDER = os.path.join(BASE_DIR, 'dog_db')
 DB_IMG_FOLDER = os.path.join(DB_FOLDER, 'images')
 DB_JSON_PATH = os.path.join(DB_FOLDER, 'dog_data.json')
+DB_JSONL_PATH = os.path.join(DB_FOLDER, 'dog_data.jsonl')
+DB_FEATURES_PATH = os.path.join(DB_FOLDER, 'image_features.npz')
+DB_BREED_IDS_PATH = os.path.join(DB_FOLDER, 'breed_ids.json')
+BREED_CSV_PATH = os.path.join(BASE_DIR, 'speciesspecies.csv')
 
 MAX_DOGS_PER_BREED = 10
 
@@ -21,14 +29,34 @@ DOG_NAMES = [
     "Teddy", "Chloe", "Toby", "Sadie", "Jack", "Lola", "Oliver", "Stella"
 ]
 
-def clean_breed_name(folder_name):
-    try:
-        parts = folder_name.split('-', 1)
-        if len(parts) > 1:
-            return parts[1].replace('_', ' ').lower().strip()
-        return folder_name.replace('_', ' ').lower().strip()
-    except Exception:
-        return "unknown"
+def save_dog_db(dogs, feature_store):
+    breed_registry = BreedRegistry.from_csv(BREED_CSV_PATH, DB_BREED_IDS_PATH)
+    for dog in dogs:
+        index_dog(dog, breed_registry, feature_store)
+    print(f"견종 매핑 확인 (기준 {len(breed_registry.ids)}종): {breed_registry.unmapped_report()}")
+
+    write_jsonl(DB_JSONL_PATH, dogs)
+    print(f"JSONL 저장 완료 ({len(dogs)}건): {DB_JSONL_PATH}")
+
+def convert_legacy_json():
+    # 예전 dog_data.json(전체 배열) -> dog_data.jsonl 일회성 변환
+    if not os.path.exists(DB_JSON_PATH):
+        print(f"변환할 파일이 없습니다: {DB_JSON_PATH}")
+        return
+    if os.path.exists(DB_JSONL_PATH):
+        print(f"이미 {DB_JSONL_PATH}이 있습니다. 덮어쓰지 않으려면 변환을 중단합니다.")
+        return
+
+    with open(DB_JSON_PATH, 'r', encoding='utf-8') as f:
+        dogs = json.load(f)
+
+    feature_store = ImageFeatureStore(DB_FEATURES_PATH, DB_IMG_FOLDER)
+    feature_store.load()
+    updated = feature_store.sync([dog.get('image') for dog in dogs])
+    feature_store.save()
+    print(f"이미지 특징 {updated}건 계산됨 (전체 {len(feature_store)}건)")
+
+    save_dog_db(dogs, feature_store)
 
 def process_single_image(args):
     src_path, dest_folder, breed_name = args
@@ -46,6 +74,8 @@ def process_single_image(args):
         dst_path = os.path.join(dest_folder, new_filename)
         
         shutil.copy2(src_path, dst_path)
+
+        features = extract_features(dst_path)
         
         return {
             'name': name,
@@ -54,7 +84,7 @@ def process_single_image(args):
             'gender': gender,
             'size': size,
             'image': dst_path
-        }
+        }, features
     except Exception as e:
         return None
 
@@ -85,7 +115,7 @@ def main():
         folder_name = os.path.basename(root)
         
         if folder_name.startswith('n0'):
-            breed_name = clean_breed_name(folder_name)
+            breed_name = canonical_breed_name(folder_name)
             
             image_files = [
                 os.path.join(root, f) 
@@ -110,6 +140,7 @@ def main():
     print(">>> 4. 데이터 생성 및 파일 복사 시작...")
 
     registered_dogs = []
+    image_features = []
     start_time = time.time()
     
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
@@ -121,7 +152,9 @@ def main():
         for future in as_completed(future_to_task):
             result = future.result()
             if result:
-                registered_dogs.append(result)
+                dog, features = result
+                registered_dogs.append(dog)
+                image_features.append((feature_key(dog['image'], DB_IMG_FOLDER), file_mtime(dog['image']), features))
             
             completed += 1
             if completed % 100 == 0 or completed == total:
@@ -129,9 +162,13 @@ def main():
 
     print(f"\n완료! 소요 시간: {time.time() - start_time:.2f}초")
 
-    print(f">>> 5. JSON 데이터 저장 중 ({len(registered_dogs)}건)...")
-    with open(DB_JSON_PATH, 'w', encoding='utf-8') as f:
-        json.dump(registered_dogs, f, ensure_ascii=False, indent=4)
+    print(f">>> 5. 데이터 저장 중 ({len(registered_dogs)}건)...")
+    feature_store = ImageFeatureStore(DB_FEATURES_PATH, DB_IMG_FOLDER)
+    feature_store.update(image_features)
+    feature_store.save()
+    print(f"이미지 특징 저장 완료 ({len(feature_store)}건): {DB_FEATURES_PATH}")
+
+    save_dog_db(registered_dogs, feature_store)
 
     print(">>> 6. 원본 캐시 데이터 정리 중...")
     try:
@@ -145,11 +182,14 @@ def main():
     if registered_dogs:
         print("생성된 데이터 예시 (1건):")
         print(json.dumps(registered_dogs[0], indent=2, ensure_ascii=False))
-        print(f"데이터 파일 위치: {DB_JSON_PATH}")
+        print(f"데이터 파일 위치: {DB_JSONL_PATH}")
     else:
         print("경고: 생성된 데이터가 없습니다!")
     print("="*40)
     print("이제 app.py를 실행하세요.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if '--convert' in sys.argv[1:]:
+        convert_legacy_json()
+    else:
+        main()
\ No newline at end of file
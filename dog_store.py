@@ -0,0 +1,52 @@
+import json
+import os
+from breed_registry import canonical_breed_name
+
+STREAM_CHUNK_SIZE = 4096
+
+
+def index_dog(dog, breed_registry, feature_store):
+    # 저장 시점에 견종명 정규화와 이미지 특징 키 계산을 끝내 둠 -> 매칭 시 문자열 가공 없음
+    # 견종 ID·특징 행 번호는 레지스트리/저장소가 바뀔 수 있으므로 저장하지 않고 매칭 때 매핑
+    dog['breed'] = canonical_breed_name(dog.get('breed', ''))
+    breed_registry.lookup(dog['breed'])
+    dog['feature_key'] = feature_store.key_of(dog.get('image'))
+    return dog
+
+
+def iter_jsonl_chunks(jsonl_path, chunk_size=STREAM_CHUNK_SIZE):
+    # 한 줄에 강아지 1마리(JSON Lines), chunk_size 마리씩만 메모리에 올림
+    chunk = []
+    with open(jsonl_path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                chunk.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                print(f"JSONL 파싱 오류 ({line_no}번째 줄): {e}")
+                continue
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def count_jsonl_records(jsonl_path):
+    if not os.path.exists(jsonl_path):
+        return 0
+    with open(jsonl_path, 'rb') as f:
+        return sum(1 for line in f if line.strip())
+
+
+def write_jsonl(jsonl_path, dogs):
+    with open(jsonl_path, 'w', encoding='utf-8') as f:
+        for dog in dogs:
+            f.write(json.dumps(dog, ensure_ascii=False) + '\n')
+
+
+def append_jsonl(jsonl_path, dog):
+    with open(jsonl_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(dog, ensure_ascii=False) + '\n')
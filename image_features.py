@@ -0,0 +1,207 @@
+import os
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8
+HASH_BITS = HASH_SIZE * HASH_SIZE
+HASH_BYTES = HASH_BITS // 8
+
+HIST_BINS = 4
+HIST_LEN = HIST_BINS ** 3
+HIST_SAMPLE_SIZE = (64, 64)
+
+# 시각 거리 = 해시 해밍 거리와 색상 히스토그램 L2 거리의 가중 평균 (둘 다 0~1로 정규화)
+HASH_WEIGHT = 0.6
+
+
+class ImageFeatureError(Exception):
+    pass
+
+
+def feature_key(image_path, image_root):
+    # dog_db/images 기준 상대 경로 (같은 파일명이 다른 폴더에 있어도 구분)
+    if not image_path:
+        return None
+    return os.path.relpath(os.path.abspath(image_path), os.path.abspath(image_root)).replace(os.sep, '/')
+
+
+def file_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def extract_features(image_path):
+    try:
+        with Image.open(image_path) as img:
+            img = img.convert('RGB')
+
+            # dHash: 인접 픽셀 밝기 비교 (64비트 -> 8바이트)
+            gray = img.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR)
+            pixels = np.asarray(gray, dtype=np.int16)
+            dhash = np.packbits((pixels[:, 1:] > pixels[:, :-1]).ravel())
+
+            # RGB 각 채널을 HIST_BINS 단계로 양자화한 3차원 색상 히스토그램
+            small = np.asarray(img.resize(HIST_SAMPLE_SIZE), dtype=np.intp) // (256 // HIST_BINS)
+            idx = (small[..., 0] * HIST_BINS + small[..., 1]) * HIST_BINS + small[..., 2]
+            hist = np.bincount(idx.ravel(), minlength=HIST_LEN).astype(np.float32)
+            hist /= hist.sum()
+
+            return dhash, hist
+    except Exception as e:
+        print(f"이미지 특징 추출 실패 ({image_path}): {e}")
+        return None
+
+
+class ImageFeatureStore:
+    # 모든 배열은 키 순으로 정렬해 유지 -> 키 조회는 np.searchsorted (키별 dict 없음)
+    # 행 번호는 저장/추가 때마다 바뀔 수 있으므로 밖에 저장하지 말고 항상 키로 찾을 것
+    def __init__(self, path, image_root):
+        self.path = path
+        self.image_root = image_root
+        self.clear()
+
+    def clear(self):
+        self.keys = np.zeros(0, dtype=str)
+        self.mtimes = np.zeros(0, dtype=np.float64)
+        self.hashes = np.zeros((0, HASH_BYTES), dtype=np.uint8)
+        self.hists = np.zeros((0, HIST_LEN), dtype=np.float32)
+        # 디코딩에 실패한 이미지 (키 -> 실패 당시 mtime), 파일이 바뀌기 전까지 다시 시도하지 않음
+        self.bad_keys = {}
+        # 마지막 저장 이후 바뀐 항목 수
+        self.pending = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                order = np.argsort(data['keys'], kind='stable')
+                self.keys = data['keys'][order]
+                self.mtimes = np.ascontiguousarray(data['mtimes'][order], dtype=np.float64)
+                self.hashes = np.ascontiguousarray(data['hashes'][order], dtype=np.uint8)
+                self.hists = np.ascontiguousarray(data['hists'][order], dtype=np.float32)
+                self.bad_keys = dict(zip(data['bad_keys'].tolist(), data['bad_mtimes'].tolist()))
+            self.pending = 0
+        except Exception as e:
+            print(f"이미지 특징 로드 오류: {e}")
+            self.clear()
+
+    def save(self):
+        # 임시 파일에 다 쓴 뒤 교체 -> 저장 중 중단돼도 기존 파일은 그대로
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    keys=self.keys,
+                    mtimes=self.mtimes,
+                    hashes=self.hashes,
+                    hists=self.hists,
+                    bad_keys=np.array(list(self.bad_keys), dtype=str),
+                    bad_mtimes=np.array(list(self.bad_keys.values()), dtype=np.float64)
+                )
+            os.replace(tmp_path, self.path)
+            self.pending = 0
+        except Exception as e:
+            print(f"이미지 특징 저장 실패: {e}")
+
+    def save_if_pending(self, min_pending=1):
+        if self.pending >= min_pending:
+            self.save()
+
+    def key_of(self, image_path):
+        return feature_key(image_path, self.image_root)
+
+    def rows_of(self, keys):
+        # 키 배열 -> 행 번호 배열 (없는 키는 -1)
+        query = np.asarray(keys, dtype=str)
+        if len(self.keys) == 0 or len(query) == 0:
+            return np.full(len(query), -1, dtype=np.intp)
+        pos = np.minimum(np.searchsorted(self.keys, query), len(self.keys) - 1)
+        return np.where(self.keys[pos] == query, pos, -1).astype(np.intp)
+
+    def row_of_key(self, key):
+        if key is None:
+            return -1
+        return int(self.rows_of([key])[0])
+
+    def is_current(self, key, mtime):
+        row = self.row_of_key(key)
+        if row >= 0:
+            return self.mtimes[row] == mtime
+        return self.bad_keys.get(key) == mtime
+
+    def update(self, items):
+        # items: [(key, mtime, (dhash, hist) 또는 None), ...]
+        # 기존 키는 해당 행을 덮어쓰고, 새 키는 모아서 정렬 위치에 한 번에 삽입
+        new_items = {}
+        updated = 0
+        for key, mtime, features in items:
+            if key is None:
+                continue
+            self.pending += 1
+            if features is None:
+                self.bad_keys[key] = mtime
+                continue
+            self.bad_keys.pop(key, None)
+            updated += 1
+
+            row = self.row_of_key(key)
+            if row >= 0:
+                self.mtimes[row] = mtime
+                self.hashes[row] = features[0]
+                self.hists[row] = features[1]
+            else:
+                new_items[key] = (mtime, features)
+
+        if new_items:
+            new_keys = np.array(sorted(new_items), dtype=str)
+            pos = np.searchsorted(self.keys, new_keys)
+            self.keys = np.insert(self.keys.astype(np.result_type(self.keys, new_keys)), pos, new_keys)
+            self.mtimes = np.insert(self.mtimes, pos, [new_items[k][0] for k in new_keys.tolist()])
+            self.hashes = np.insert(self.hashes, pos, np.stack([new_items[k][1][0] for k in new_keys.tolist()]), axis=0)
+            self.hists = np.insert(self.hists, pos, np.stack([new_items[k][1][1] for k in new_keys.tolist()]), axis=0)
+        return updated
+
+    def add(self, image_path):
+        key = self.key_of(image_path)
+        self.update([(key, file_mtime(image_path), extract_features(image_path))])
+        return key
+
+    def sync(self, image_paths):
+        # 새 이미지, 수정된 이미지만 다시 계산 (실패 기록이 있고 파일이 그대로면 건너뜀)
+        todo = {}
+        for path in image_paths:
+            if not path:
+                continue
+            key = self.key_of(path)
+            mtime = file_mtime(path)
+            if key in todo or mtime is None or self.is_current(key, mtime):
+                continue
+            todo[key] = (mtime, path)
+
+        if not todo:
+            return 0
+        self.update((key, mtime, extract_features(path)) for key, (mtime, path) in todo.items())
+        return len(todo)
+
+    def distances(self, features):
+        if len(self.keys) == 0:
+            return np.zeros(0, dtype=np.float32)
+        dhash, hist = features
+
+        hamming = np.unpackbits(np.bitwise_xor(self.hashes, dhash), axis=1).sum(axis=1) / HASH_BITS
+        hist_l2 = np.sqrt(((self.hists - hist) ** 2).sum(axis=1)) / np.sqrt(2.0)
+
+        return HASH_WEIGHT * hamming + (1.0 - HASH_WEIGHT) * hist_l2
+
+    def query_distances(self, image_path):
+        features = extract_features(image_path)
+        if features is None:
+            raise ImageFeatureError(f"사진을 읽을 수 없습니다: {os.path.basename(image_path)}")
+        return self.distances(features)